@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measure how deduplicate_events() scales with the number of records.
+
+Records are extracted from synthetic catalogs (tests/synthetic_catalog.py):
+events get one to four versions each, spread over the ranked, unranked and
+excluded catalogs. Time per record should stay roughly flat as the size
+grows. The garbage collector is paused while timing, as the pipeline does
+around bulk allocations (_gc_paused()), so its full collections, which
+walk every live record, do not show up as growth.
+
+Usage:
+    python benchmarks/bench_dedupe.py [--sizes 100000 1000000 2000000]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from fetch_gwosc_data import _gc_paused, deduplicate_events  # noqa: E402
+from synthetic_catalog import make_records  # noqa: E402
+
+
+def measure(count, repeat=3):
+    """
+    Time deduplicate_events() on synthetic records.
+
+    Parameters:
+        count (int): Number of synthetic catalog entries
+        repeat (int): Runs to take the best of
+
+    Returns:
+        dict: Record count, best time and unique event count
+    """
+    events = make_records(count)
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()), _gc_paused():
+            start = time.perf_counter()
+            _, unique = deduplicate_events(events)
+            best = min(best, time.perf_counter() - start)
+    return {'count': len(events), 'seconds': best, 'unique': len(unique)}
+
+
+def main(argv=None):
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 2_000_000],
+                        help="Catalog sizes to measure (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs per size, the best is reported (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    print(f"{'records':>10}  {'unique':>10}  {'time':>9}  {'per record':>11}")
+    for count in args.sizes:
+        result = measure(count, args.repeat)
+        per_record = result['seconds'] / result['count'] * 1e9
+        print(f"{result['count']:>10}  {result['unique']:>10}  {result['seconds']:>7.3f} s  {per_record:>8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
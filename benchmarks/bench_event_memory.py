@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare the memory footprint of processed events stored as GWEvent records
+versus the plain dicts they serialize to.
+
+Usage:
+    python benchmarks/bench_event_memory.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from synthetic_catalog import make_records  # noqa: E402
+
+
+def measure(count):
+    """
+    Measure the container overhead of both representations.
+
+    Field values are shared between the two, so only the cost of the
+    records themselves (and the list holding them) is compared.
+
+    Parameters:
+        count (int): Number of synthetic catalog entries
+
+    Returns:
+        dict: Record count and bytes used by the records and by the dicts
+    """
+    events = make_records(count)
+    gc.collect()
+
+    tracemalloc.start()
+    records = list(events)
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Records are created before tracing starts, so count their instances
+    record_bytes += sum(sys.getsizeof(event) for event in records)
+    del records
+
+    tracemalloc.start()
+    dicts = [event.to_dict() for event in events]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dicts
+
+    return {'count': len(events), 'record_bytes': record_bytes, 'dict_bytes': dict_bytes}
+
+
+def main(argv=None):
+    """Run the benchmark and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Catalog sizes to measure (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    print(f"{'events':>10}  {'GWEvent':>12}  {'dict':>12}  {'ratio':>6}")
+    for count in args.sizes:
+        result = measure(count)
+        record_mb = result['record_bytes'] / 1e6
+        dict_mb = result['dict_bytes'] / 1e6
+        print(f"{result['count']:>10}  {record_mb:>9.1f} MB  {dict_mb:>9.1f} MB  "
+              f"{dict_mb / record_mb:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
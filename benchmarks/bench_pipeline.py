@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Time each stage of the fetch_gwosc_data pipeline on synthetic catalogs.
+
+Every stage runs once for wall time and once under tracemalloc for its peak
+memory. Results are written as JSON so two commits can be compared:
+
+    python benchmarks/bench_pipeline.py --output before.json
+    git checkout <other commit>
+    python benchmarks/bench_pipeline.py --compare before.json
+
+Runs fully offline, on catalogs from tests/synthetic_catalog.py.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from synthetic_catalog import make_catalog  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def run_stage(func, measure_memory):
+    """
+    Run one stage, silencing its progress output.
+
+    Parameters:
+        func (callable): Stage to run, without arguments
+        measure_memory (bool): Run it a second time under tracemalloc
+
+    Returns:
+        tuple: (result, seconds, peak_bytes) with peak_bytes None when
+            memory is not measured
+    """
+    gc.collect()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+
+    peak = None
+    if measure_memory:
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def bench_size(count, measure_memory, engines):
+    """
+    Run every stage on one synthetic catalog.
+
+    Parameters:
+        count (int): Number of catalog entries
+        measure_memory (bool): Also record peak memory per stage
+        engines (list): Extraction engines to time
+
+    Returns:
+        list: One result dict per stage
+    """
+    payload = json.dumps({'events': make_catalog(count)}).encode('utf-8')
+    results = []
+
+    def record(stage, func, items_in, size_of=len):
+        result, seconds, peak = run_stage(func, measure_memory)
+        results.append({
+            'size': count,
+            'stage': stage,
+            'seconds': round(seconds, 6),
+            'peak_bytes': peak,
+            'items_in': items_in,
+            'items_out': size_of(result) if result is not None else None,
+        })
+        return result
+
+    events = record('decode', lambda: json.loads(payload)['events'], len(payload))
+    record('stream_decode', lambda: list(pipeline.iter_gwosc_events([payload])), len(payload))
+
+    records = None
+    for engine in engines:
+        records = record(f"extract_{engine}",
+                         lambda: pipeline.extract_event_parameters(events, engine=engine), len(events))
+
+    record('deduplicate', lambda: pipeline.deduplicate_events(records), len(records),
+           size_of=lambda result: len(result[1]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'gw_events.json'
+        # force: the memory run must not take the skip-unchanged path of the timed one
+        record('save_data', lambda: pipeline.save_data(records, output, force=True), len(records),
+               size_of=lambda _: output.stat().st_size)
+
+    return results
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git tree."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """
+    Print a table of results, with the ratio to a baseline run if given.
+
+    Parameters:
+        results (list): Result dicts of this run
+        baseline (list): Result dicts of an earlier run, or None
+    """
+    previous = {(r['size'], r['stage']): r for r in baseline or []}
+
+    header = f"{'size':>9}  {'stage':<18} {'time':>10}  {'peak':>10}"
+    print(header + ("  vs baseline" if baseline else ""))
+    for r in results:
+        peak = f"{r['peak_bytes'] / 1e6:7.1f} MB" if r['peak_bytes'] is not None else f"{'-':>10}"
+        line = f"{r['size']:>9}  {r['stage']:<18} {r['seconds']:>8.3f} s  {peak}"
+        old = previous.get((r['size'], r['stage']))
+        if old and old['seconds']:
+            line += f"  {r['seconds'] / old['seconds']:>6.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    """Run the benchmark, print a table and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="Catalog sizes to run (default: %(default)s)")
+    parser.add_argument('--engines', nargs='+', choices=['python', 'columnar'],
+                        help="Extraction engines (default: python, plus columnar when NumPy is installed)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip the tracemalloc runs, halving the run time")
+    parser.add_argument('--output',
+                        help="Results file (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument('--compare', metavar='RESULTS',
+                        help="Earlier results file to compare the times against")
+    args = parser.parse_args(argv)
+
+    engines = args.engines or (['python', 'columnar'] if pipeline.np is not None else ['python'])
+    baseline = json.loads(Path(args.compare).read_text())['results'] if args.compare else None
+
+    commit = git_commit()
+    results = []
+    for count in args.sizes:
+        print(f"Running {count} events...", file=sys.stderr)
+        results.extend(bench_size(count, not args.no_memory, engines))
+
+    print_results(results, baseline)
+
+    report = {
+        'created': datetime.utcnow().isoformat() + 'Z',
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': pipeline.np.__version__ if pipeline.np is not None else None,
+        'results': results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline-{commit or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
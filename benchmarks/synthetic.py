@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Write a synthetic GWOSC-shaped catalog for offline benchmarks.
+
+The catalog comes from tests/synthetic_catalog.py. A '.gz' output can be
+fed straight to the pipeline:
+
+    python benchmarks/synthetic.py --count 100000 --output /tmp/allevents.json.gz
+    python src/fetch_gwosc_data.py --from-snapshot /tmp/allevents.json.gz --output /tmp/out.json
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+
+from synthetic_catalog import excluded_share, make_catalog  # noqa: E402
+
+
+def main(argv=None):
+    """Write a synthetic catalog to a JSON file."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=10_000,
+                        help="Number of catalog entries (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed (default: %(default)s)")
+    parser.add_argument('--output', required=True,
+                        help="Output JSON file, allevents-shaped; gzip-compressed if it ends in .gz")
+    args = parser.parse_args(argv)
+
+    events = make_catalog(args.count, args.seed)
+    payload = json.dumps({'events': events}).encode('utf-8')
+    if args.output.endswith('.gz'):
+        payload = gzip.compress(payload, mtime=0)
+    Path(args.output).write_bytes(payload)
+
+    print(f"Wrote {len(events)} entries ({excluded_share(events):.0%} from excluded catalogs) "
+          f"to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 // Global data storage
 let allEventsData = null;
 let allEventsList = []; // All events including alternate versions
+let shardManifest = null; // Manifest of the sharded output, when available
+const shardCache = new Map(); // Shard file -> promise of its events
+const DATA_CACHE_DB = 'gw-events'; // IndexedDB database holding the last full dataset
 
 // Load and visualize gravitational wave data
 async function loadData() {
     try {
-        const response = await fetch('./data/gw_events.json');
-
-        if (!response.ok) throw new Error('Failed to load data');
-
-        const data = await response.json();
+        // Returning visitors patch their cached copy with deltas. Otherwise
+        // only the primaries shard is needed for the first plot; fall back
+        // to the full file when the data directory has no shards. The cache
+        // is only seeded when the full file is downloaded anyway, so sharded
+        // visitors never pay for the whole dataset up front
+        const deltaIndex = await fetchDeltaIndex();
+        const data = await loadCachedData(deltaIndex) || await loadShardedData() ||
+            await loadFullData(deltaIndex);
         allEventsData = data; // Store globally
-        allEventsList = data.all_events || data.events; // Store all versions
 
         // Populate catalog filter
         populateCatalogFilter(data.events);
@@ -41,6 +46,189 @@ async function loadData() {
     }
 }
 
+// Load the shard manifest and the primaries shard, or null without shards.
+// The manifest is always revalidated; with --hashed it names immutable
+// shards, which caches can keep forever
+async function loadShardedData() {
+    let response;
+    try {
+        response = await fetch('./data/shards/manifest.json', { cache: 'no-cache' });
+    } catch (error) {
+        return null;
+    }
+    if (!response.ok) return null;
+
+    shardManifest = await response.json();
+    const primaries = await loadShard(shardManifest.primaries.file);
+    return { ...shardManifest, events: primaries };
+}
+
+// Load the complete gw_events.json with every version
+async function loadFullData(deltaIndex) {
+    const raw = await fetchFullData();
+    if (deltaIndex) storeCachedData(raw).catch(() => {});
+    return useFullData(raw);
+}
+
+// Prefer the immutable gw_events.<hash>.json named by latest.json, which
+// caches can keep forever; only the small pointer is revalidated
+async function fetchFullData() {
+    const file = await fetchLatestFile();
+    let response = file ? await fetch(`./data/${file}`) : null;
+    if (!response || !response.ok) response = await fetch('./data/gw_events.json');
+
+    if (!response.ok) throw new Error('Failed to load data');
+    return response.json();
+}
+
+async function fetchLatestFile() {
+    try {
+        const response = await fetch('./data/latest.json', { cache: 'no-cache' });
+        return response.ok ? (await response.json()).file : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+function useFullData(raw) {
+    const data = expandEventsData({ ...raw }); // Keeps raw as published for the cache
+    allEventsList = data.all_events || data.events; // Store all versions
+    return data;
+}
+
+// The delta index names the latest content hash and the delta leading away
+// from each older one, or null when no deltas are published
+async function fetchDeltaIndex() {
+    try {
+        const response = await fetch('./data/deltas/index.json', { cache: 'no-cache' });
+        return response.ok ? await response.json() : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+// Bring the dataset cached in IndexedDB up to date by applying deltas, or
+// return null when there is no usable cached copy
+async function loadCachedData(deltaIndex) {
+    if (!deltaIndex) return null;
+    try {
+        let raw = await readCachedData();
+        if (!raw) return null;
+
+        const start = raw.content_hash;
+        while (raw.content_hash !== deltaIndex.latest) {
+            const entry = deltaIndex.deltas[raw.content_hash];
+            if (!entry) return null; // Too old, the chain is gone
+            const response = await fetch(`./data/deltas/${entry.file}`);
+            if (!response.ok) return null;
+            raw = applyDelta(raw, await response.json());
+        }
+        if (raw.content_hash !== start) await storeCachedData(raw);
+        return useFullData(raw);
+    } catch (error) {
+        console.warn('Cached data unusable, reloading:', error);
+        return null;
+    }
+}
+
+// Rebuild the next dataset version: pairs of [start, count] copy a run of
+// the previous all_events, objects are new or changed events
+function applyDelta(raw, delta) {
+    if (raw.content_hash !== delta.from) throw new Error('Delta does not apply to the cached data');
+
+    const allEvents = [];
+    for (const operation of delta.all_events) {
+        if (Array.isArray(operation)) {
+            const [start, count] = operation;
+            for (let i = start; i < start + count; i++) allEvents.push(raw.all_events[i]);
+        } else {
+            allEvents.push(operation);
+        }
+    }
+    return { ...delta.header, event_versions: delta.event_versions, all_events: allEvents };
+}
+
+function openDataCache() {
+    return new Promise((resolve, reject) => {
+        if (!window.indexedDB) return reject(new Error('IndexedDB unavailable'));
+        const request = indexedDB.open(DATA_CACHE_DB, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore('data');
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function readCachedData() {
+    const db = await openDataCache();
+    return new Promise((resolve, reject) => {
+        const request = db.transaction('data').objectStore('data').get('gw_events');
+        request.onsuccess = () => resolve(request.result || null);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// Store the dataset as published, before expandEventsData() adds `events`
+async function storeCachedData(raw) {
+    const db = await openDataCache();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction('data', 'readwrite');
+        transaction.objectStore('data').put(raw, 'gw_events');
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Fetch a shard once and reuse it for later selections
+function loadShard(file) {
+    if (!shardCache.has(file)) {
+        const events = fetch(`./data/shards/${file}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`Failed to load ${file}`);
+                return response.json();
+            })
+            .then(shard => shard.events)
+            .catch(error => {
+                shardCache.delete(file); // Retry on the next selection
+                throw error;
+            });
+        shardCache.set(file, events);
+    }
+    return shardCache.get(file);
+}
+
+// All versions from one catalog
+async function loadCatalogEvents(catalog) {
+    if (!shardManifest) return allEventsList.filter(event => event.catalog === catalog);
+    return loadShard(shardManifest.catalogs[catalog].file);
+}
+
+// All versions of one event, loading only the shards of its catalogs
+async function loadEventVersions(event) {
+    if (!shardManifest) return allEventsList.filter(e => e.name === event.name);
+
+    // Only events with several versions list their catalogs
+    const primary = allEventsData.events.find(e => e.name === event.name);
+    if (!primary || !primary.catalogs) return [event];
+
+    const shards = await Promise.all(primary.catalogs.map(loadCatalogEvents));
+    return shards.flat().filter(e => e.name === event.name);
+}
+
+// Rebuild the primary events list from the normalized data format.
+// Format 2 stores every version once in `all_events` and lists, for each
+// unique event, the indices of its versions in `event_versions` (primary
+// first). Older files already carry `events` and are returned unchanged.
+function expandEventsData(data) {
+    if (!data.event_versions) return data;
+
+    const allEvents = data.all_events;
+    data.events = data.event_versions.map(indices => {
+        const versions = indices.map(i => allEvents[i]);
+        return { ...versions[0], is_primary: true, all_versions: versions };
+    });
+    return data;
+}
+
 function populateCatalogFilter(events) {
     // Define catalog order and display names
     const catalogInfo = {
@@ -53,7 +241,8 @@ function populateCatalogFilter(events) {
     };
 
     // Extract unique catalogs and sort by priority
-    const uniqueCatalogs = [...new Set(allEventsList.map(e => e.catalog))].filter(c => c && c !== 'unknown');
+    const catalogs = shardManifest ? Object.keys(shardManifest.catalogs) : allEventsList.map(e => e.catalog);
+    const uniqueCatalogs = [...new Set(catalogs)].filter(c => c && c !== 'unknown');
     const sortedCatalogs = uniqueCatalogs
         .filter(c => catalogInfo[c]) // Only include known catalogs
         .sort((a, b) => catalogInfo[a].priority - catalogInfo[b].priority);
@@ -72,13 +261,18 @@ function populateCatalogFilter(events) {
     });
 
     // Add event listener
-    select.addEventListener('change', (e) => {
+    select.addEventListener('change', async (e) => {
         const selectedCatalog = e.target.value;
         if (selectedCatalog === 'all') {
             displayEvents(allEventsData.events); // Show unique events
         } else {
-            const filtered = allEventsList.filter(event => event.catalog === selectedCatalog);
-            displayEvents(filtered);
+            try {
+                const filtered = await loadCatalogEvents(selectedCatalog);
+                // Ignore shards that arrive after another selection
+                if (select.value === selectedCatalog) displayEvents(filtered);
+            } catch (error) {
+                console.error('Error loading catalog:', error);
+            }
         }
     });
 }
@@ -264,7 +458,7 @@ function createTrace(events, name, color) {
 }
 
 // Show event details panel
-function showEventDetails(event) {
+async function showEventDetails(event) {
     const panel = document.getElementById('eventDetailPanel');
     const eventName = document.getElementById('detailEventName');
     const primaryParams = document.getElementById('primaryParameters');
@@ -300,7 +494,12 @@ function showEventDetails(event) {
     `).join('');
 
     // Find all versions of this event
-    const allVersions = allEventsList.filter(e => e.name === event.name);
+    let allVersions = [event];
+    try {
+        allVersions = await loadEventVersions(event);
+    } catch (error) {
+        console.error('Error loading event versions:', error);
+    }
 
     if (allVersions.length > 1) {
         versionsSection.style.display = 'block';
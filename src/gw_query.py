@@ -0,0 +1,610 @@
+#!/usr/bin/env python3
+"""
+Query the processed gravitational wave events locally.
+
+Two commands read the gw_events.json written by fetch_gwosc_data.py:
+
+    python src/gw_query.py serve [--data PATH] [--port PORT]
+    python src/gw_query.py crossmatch TRIGGERS.csv --window SECONDS
+
+'serve' answers filter, range and aggregate queries over HTTP from
+in-memory indexes; 'crossmatch' pairs external triggers with the events
+within a coincidence window.
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import chain
+from operator import itemgetter
+from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from fetch_gwosc_data import load_output
+
+try:
+    import numpy as np
+except ImportError:  # TimeIndex then searches with bisect
+    np = None
+
+
+# Layout of gw_events.json read here, OUTPUT_FORMAT_VERSION in fetch_gwosc_data.py
+FORMAT_VERSION = 2
+
+# Processed events read by default
+DATA_PATH = "docs/data/gw_events.json"
+
+# Local query server (serve): default address and response cache size
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8000
+SERVE_CACHE_SIZE = 4096
+
+# Query parameters of the query server: exact-match fields (comma-separated
+# values match any) and numeric fields filtered with <field>_min/<field>_max
+QUERY_MATCH_FIELDS = ('name', 'catalog', 'source_type')
+QUERY_RANGE_FIELDS = ('gps_time', 'm1', 'm2', 'snr', 'luminosity_distance', 'final_mass_source')
+
+
+class SortedIndex:
+    """
+    Positions of records sorted by one numeric field, for range queries.
+
+    Records where the field is null are left out.
+    """
+
+    def __init__(self, records, field):
+        pairs = sorted((record[field], position) for position, record in enumerate(records)
+                       if record[field] is not None)
+        self.values = [value for value, _ in pairs]
+        self.positions = [position for _, position in pairs]
+
+    def bounds(self, low=None, high=None):
+        """
+        Slice of self.positions with low <= value <= high.
+
+        Parameters:
+            low (float): Lower bound, None for no bound
+            high (float): Upper bound, None for no bound
+
+        Returns:
+            tuple: (start, stop) indices into self.positions
+        """
+        start = bisect_left(self.values, low) if low is not None else 0
+        stop = bisect_right(self.values, high) if high is not None else len(self.values)
+        return start, max(start, stop)
+
+
+class TimeIndex(SortedIndex):
+    """
+    Records sorted by GPS time, for time windows and trigger cross-matching.
+
+    Times are held in a NumPy array searched with searchsorted when NumPy is
+    installed, and in a list searched with bisect otherwise; results are the
+    same.
+    """
+
+    def __init__(self, records, field='gps_time'):
+        super().__init__(records, field)
+        if np is not None:
+            self.values = np.asarray(self.values, dtype=np.float64)
+
+    def bounds(self, low=None, high=None):
+        if np is None:
+            return super().bounds(low, high)
+        start = int(np.searchsorted(self.values, low, side='left')) if low is not None else 0
+        stop = int(np.searchsorted(self.values, high, side='right')) if high is not None else len(self.values)
+        return start, max(start, stop)
+
+    def window(self, start_time, end_time):
+        """
+        Records with start_time <= GPS time <= end_time.
+
+        Parameters:
+            start_time (float): Window start (GPS seconds)
+            end_time (float): Window end (GPS seconds)
+
+        Returns:
+            list: Positions of the records, in time order
+        """
+        start, stop = self.bounds(start_time, end_time)
+        return self.positions[start:stop]
+
+    def cross_match(self, trigger_times, window):
+        """
+        Pair every trigger with every record within +/- window seconds.
+
+        Each trigger costs two binary searches, so N triggers against M
+        records take O((N + M) log M) plus the number of pairs, instead of
+        the N * M comparisons of a nested loop.
+
+        Parameters:
+            trigger_times (list): GPS times of the external triggers
+            window (float): Coincidence window (seconds, either side)
+
+        Returns:
+            list: (trigger index, record position, record time - trigger
+                time) tuples, by trigger then record time
+        """
+        if np is None:
+            pairs = []
+            for trigger, trigger_time in enumerate(trigger_times):
+                start, stop = self.bounds(trigger_time - window, trigger_time + window)
+                pairs.extend((trigger, self.positions[i], self.values[i] - trigger_time)
+                             for i in range(start, stop))
+            return pairs
+
+        times = np.asarray(trigger_times, dtype=np.float64)
+        starts = np.searchsorted(self.values, times - window, side='left')
+        stops = np.searchsorted(self.values, times + window, side='right')
+        counts = np.maximum(stops - starts, 0)
+
+        # Flatten the per-trigger [start, stop) ranges into one index array
+        triggers = np.repeat(np.arange(len(times)), counts)
+        first = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        matched = first + np.arange(counts.sum())
+        positions = np.asarray(self.positions, dtype=np.int64)[matched]
+        offsets = self.values[matched] - times[triggers]
+        return list(zip(triggers.tolist(), positions.tolist(), offsets.tolist()))
+
+
+def load_triggers(path, time_column='gps_time'):
+    """
+    Read external triggers (GRBs, neutrinos, ...) from a CSV file.
+
+    Parameters:
+        path (str): CSV file with a header row
+        time_column (str): Column holding the GPS time of each trigger
+
+    Returns:
+        tuple: (column names, rows as dicts, GPS times)
+
+    Raises:
+        ValueError: If the column is missing or a time is not a finite number
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames or []
+        if time_column not in columns:
+            raise ValueError(f"{path} has no '{time_column}' column (columns: {', '.join(columns)})")
+        rows = list(reader)
+
+    times = []
+    for line, row in enumerate(rows, start=2):
+        try:
+            time = float(row[time_column])
+        except (TypeError, ValueError):
+            time = math.nan
+        if not math.isfinite(time):
+            raise ValueError(f"{path}:{line}: '{row[time_column]}' is not a GPS time")
+        times.append(time)
+    return columns, rows, times
+
+
+class EventIndex:
+    """
+    In-memory indexes over a processed gw_events.json for the query server.
+
+    Records are the entries of 'all_events'. Exact-match fields are indexed
+    by value, QUERY_RANGE_FIELDS by SortedIndex. A query starts from the
+    most selective index and checks the remaining filters record by record.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.records = data['all_events']
+        self.versions = {}
+        self.primary = set()
+        for indices in data['event_versions']:
+            self.primary.add(indices[0])
+            self.versions[self.records[indices[0]]['name']] = indices
+
+        self.by_value = {field: defaultdict(list) for field in QUERY_MATCH_FIELDS}
+        for position, record in enumerate(self.records):
+            for field, index in self.by_value.items():
+                index[record[field]].append(position)
+        self.by_range = {field: (TimeIndex if field == 'gps_time' else SortedIndex)(self.records, field)
+                         for field in QUERY_RANGE_FIELDS}
+
+    def select(self, match=None, ranges=None, primary=False):
+        """
+        Positions of the records passing every filter, in output order.
+
+        Parameters:
+            match (dict): Maps a QUERY_MATCH_FIELDS field to accepted values
+            ranges (dict): Maps a QUERY_RANGE_FIELDS field to (low, high),
+                either bound may be None
+            primary (bool): Only primary versions
+
+        Returns:
+            list: Positions into self.records
+        """
+        match = match or {}
+        ranges = ranges or {}
+
+        # Candidates of each filter as (count, lazy candidates); only the
+        # smallest set is walked
+        plans = [(len(self.records), lambda: range(len(self.records)))]
+        for field, values in match.items():
+            lists = [self.by_value[field].get(value, ()) for value in values]
+            plans.append((sum(map(len, lists)), lambda lists=lists: chain.from_iterable(lists)))
+        for field, (low, high) in ranges.items():
+            index = self.by_range[field]
+            start, stop = index.bounds(low, high)
+            plans.append((stop - start, lambda index=index, start=start, stop=stop: index.positions[start:stop]))
+        candidates = min(plans, key=itemgetter(0))[1]()
+
+        records = self.records
+        selected = []
+        for position in candidates:
+            if primary and position not in self.primary:
+                continue
+            record = records[position]
+            if any(record[field] not in values for field, values in match.items()):
+                continue
+            if any(record[field] is None
+                   or (low is not None and record[field] < low)
+                   or (high is not None and record[field] > high)
+                   for field, (low, high) in ranges.items()):
+                continue
+            selected.append(position)
+        selected.sort()
+        return selected
+
+
+def _aggregate(records, positions, group_by=None):
+    """Count and min/max/mean of QUERY_RANGE_FIELDS per group."""
+    groups = defaultdict(list)
+    for position in positions:
+        groups[records[position][group_by] if group_by else 'all'].append(records[position])
+
+    result = {}
+    for key, members in sorted(groups.items(), key=lambda item: str(item[0])):
+        stats = {'count': len(members)}
+        for field in QUERY_RANGE_FIELDS:
+            values = [record[field] for record in members if record[field] is not None]
+            stats[field] = {
+                'count': len(values),
+                'min': min(values) if values else None,
+                'max': max(values) if values else None,
+                'mean': round(sum(values) / len(values), 6) if values else None,
+            }
+        result[key] = stats
+    return result
+
+
+class CatalogService:
+    """
+    Answers query server requests from an EventIndex.
+
+    Query strings are normalized (parameters sorted, comma-separated values
+    split, deduplicated and sorted) before they reach an LRU cache of
+    encoded responses, so equivalent queries share one entry.
+
+    Endpoints (all GET, JSON):
+        /events          Filter with name, catalog, source_type,
+                         <field>_min/<field>_max for QUERY_RANGE_FIELDS and
+                         primary=1; sort=<field> or -<field>, limit, offset
+        /events/<name>   All versions of one event, primary first
+        /aggregate       Same filters plus group_by (a QUERY_MATCH_FIELDS
+                         field): count and min/max/mean per group
+        /stats           Dataset and response cache statistics
+    """
+
+    PAGING_PARAMETERS = ('sort', 'limit', 'offset')
+
+    def __init__(self, index, cache_size=SERVE_CACHE_SIZE):
+        self.index = index
+        self.respond = lru_cache(maxsize=cache_size)(self._respond)
+
+    @staticmethod
+    def normalize_query(query):
+        """
+        Canonical form of a query string.
+
+        Parameters:
+            query (str): Raw query string
+
+        Returns:
+            tuple: Sorted (name, value) pairs; names of QUERY_MATCH_FIELDS
+                map to a sorted tuple of values
+
+        Raises:
+            ValueError: On a parameter given twice
+        """
+        params = {}
+        for name, value in parse_qsl(query, keep_blank_values=False):
+            if name in QUERY_MATCH_FIELDS:
+                values = set(params.get(name, ())) | {v for v in value.split(',') if v}
+                params[name] = tuple(sorted(values))
+            elif name in params:
+                raise ValueError(f"parameter '{name}' given more than once")
+            else:
+                params[name] = value
+        return tuple(sorted(params.items()))
+
+    def handle(self, path, query):
+        """
+        Answer one request.
+
+        Parameters:
+            path (str): Request path
+            query (str): Raw query string
+
+        Returns:
+            tuple: (HTTP status, encoded JSON body)
+        """
+        try:
+            normalized = self.normalize_query(query)
+        except ValueError as e:
+            return 400, self._encode({'error': str(e)})
+        path = path.rstrip('/') or '/'
+        if path == '/stats':
+            return 200, self._encode(self._stats())  # Live numbers, never cached
+        return self.respond(path, normalized)
+
+    @staticmethod
+    def _encode(payload):
+        return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def _respond(self, path, params):
+        try:
+            if path == '/events':
+                return 200, self._encode(self._events(dict(params)))
+            if path.startswith('/events/'):
+                name = unquote(path[len('/events/'):])
+                if name not in self.index.versions:
+                    return 404, self._encode({'error': f"unknown event '{name}'"})
+                return 200, self._encode({'name': name, 'versions': [
+                    self.index.records[i] for i in self.index.versions[name]]})
+            if path == '/aggregate':
+                return 200, self._encode(self._aggregate(dict(params)))
+        except ValueError as e:
+            return 400, self._encode({'error': str(e)})
+        return 404, self._encode({'error': f"unknown endpoint '{path}'"})
+
+    def _select(self, params, allowed=()):
+        """Run the filters in params, rejecting unknown parameters."""
+        match = {field: params.pop(field) for field in QUERY_MATCH_FIELDS if field in params}
+        ranges = {}
+        for field in QUERY_RANGE_FIELDS:
+            bounds = tuple(params.pop(f"{field}_{bound}", None) for bound in ('min', 'max'))
+            if bounds != (None, None):
+                try:
+                    ranges[field] = tuple(float(bound) if bound is not None else None for bound in bounds)
+                except ValueError:
+                    raise ValueError(f"{field} bounds must be numbers") from None
+                # float() also parses 'nan' and 'inf', which no record can match
+                if not all(math.isfinite(bound) for bound in ranges[field] if bound is not None):
+                    raise ValueError(f"{field} bounds must be finite numbers")
+        primary = params.pop('primary', '0').lower() in ('1', 'true', 'yes')
+
+        unknown = set(params) - set(allowed)
+        if unknown:
+            raise ValueError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+        return self.index.select(match, ranges, primary)
+
+    def _events(self, params):
+        positions = self._select(params, allowed=self.PAGING_PARAMETERS)
+        records = self.index.records
+
+        sort = params.get('sort')
+        if sort:
+            field = sort.lstrip('-')
+            if field not in QUERY_RANGE_FIELDS + QUERY_MATCH_FIELDS:
+                raise ValueError(f"cannot sort by '{field}'")
+            # Nulls last in either direction
+            present = [p for p in positions if records[p][field] is not None]
+            present.sort(key=lambda p: records[p][field], reverse=sort.startswith('-'))
+            positions = present + [p for p in positions if records[p][field] is None]
+
+        try:
+            offset = int(params.get('offset', 0))
+            limit = int(params['limit']) if 'limit' in params else None
+        except ValueError:
+            raise ValueError("limit and offset must be integers") from None
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("limit and offset must not be negative")
+        page = positions[offset:offset + limit if limit is not None else None]
+
+        return {'count': len(positions), 'offset': offset, 'events': [records[p] for p in page]}
+
+    def _aggregate(self, params):
+        group_by = params.pop('group_by', None)
+        if group_by is not None and group_by not in QUERY_MATCH_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(QUERY_MATCH_FIELDS)}")
+        positions = self._select(params)
+        return {'count': len(positions), 'group_by': group_by,
+                'groups': _aggregate(self.index.records, positions, group_by)}
+
+    def _stats(self):
+        info = self.respond.cache_info()
+        return {
+            'content_hash': self.index.data.get('content_hash'),
+            'updated': self.index.data.get('updated'),
+            'records': len(self.index.records),
+            'unique_events': len(self.index.versions),
+            'cache': {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize},
+        }
+
+
+class CatalogRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of the CatalogService in self.server.service."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, a client reuses its connection
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body would wait for a delayed ACK, capping a connection at ~25 requests/s
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, body = self.server.service.handle(url.path, url.query)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging to stderr would dominate the response time
+        pass
+
+
+def coincidence_window(value):
+    """argparse type of --window: a finite, non-negative number of seconds."""
+    try:
+        window = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a number") from None
+    # float() also parses 'nan' and 'inf', which would match nothing or everything
+    if not math.isfinite(window) or window < 0:
+        raise argparse.ArgumentTypeError(f"must be a finite number of seconds >= 0, not '{value}'")
+    return window
+
+
+def load_data(path):
+    """
+    Read the processed events, exiting with status 1 if they are unusable.
+
+    Parameters:
+        path (str): gw_events.json written by fetch_gwosc_data.py
+
+    Returns:
+        dict: Its root object
+    """
+    data = load_output(Path(path))
+    if data.get('format_version') != FORMAT_VERSION:
+        print(f"Error: {path} is missing or not a format {FORMAT_VERSION} gw_events.json "
+              f"(regenerate it with: python src/fetch_gwosc_data.py --output {path})", file=sys.stderr)
+        sys.exit(1)
+    return data
+
+
+def serve(argv=None):
+    """
+    Serve queries over a processed gw_events.json on a local HTTP port.
+
+    Parameters:
+        argv (list): Command line arguments after 'serve', defaults to
+            sys.argv[2:]
+    """
+    parser = argparse.ArgumentParser(
+        prog='gw_query.py serve',
+        description="Serve filter, range and aggregate queries over processed GW events")
+    parser.add_argument('--data', default=DATA_PATH,
+                        help=f"Processed events file in output format {FORMAT_VERSION}, as written by "
+                             "fetch_gwosc_data.py; an older file must be regenerated by running it once "
+                             "(default: %(default)s)")
+    parser.add_argument('--host', default=SERVE_HOST,
+                        help="Address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=SERVE_PORT,
+                        help="Port to listen on (default: %(default)s)")
+    parser.add_argument('--cache-size', type=int, default=SERVE_CACHE_SIZE,
+                        help="Responses kept in the LRU cache (default: %(default)s)")
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+
+    data = load_data(args.data)
+
+    index = EventIndex(data)
+    try:
+        server = ThreadingHTTPServer((args.host, args.port), CatalogRequestHandler)
+    except OSError as e:
+        print(f"Error: cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        sys.exit(1)
+    server.daemon_threads = True
+    server.service = CatalogService(index, cache_size=args.cache_size)
+
+    print(f"Serving {len(index.records)} records ({len(index.versions)} unique events) "
+          f"on http://{args.host}:{server.server_port}/")
+    print("Endpoints: /events, /events/<name>, /aggregate, /stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped")
+    finally:
+        server.server_close()
+
+
+def crossmatch(argv=None):
+    """
+    Cross-match a CSV trigger list against the processed events.
+
+    Writes one CSV row per (trigger, event) pair within the coincidence
+    window: the trigger's columns followed by the event's name, catalog,
+    GPS time and the time offset.
+
+    Parameters:
+        argv (list): Command line arguments after 'crossmatch', defaults to
+            sys.argv[2:]
+    """
+    parser = argparse.ArgumentParser(
+        prog='gw_query.py crossmatch',
+        description="Find GW events coincident with external triggers")
+    parser.add_argument('triggers', help="CSV file of triggers, with a header row")
+    parser.add_argument('--window', type=coincidence_window, required=True,
+                        help="Coincidence window in seconds, either side of each trigger")
+    parser.add_argument('--time-column', default='gps_time',
+                        help="Trigger column holding GPS times (default: %(default)s)")
+    parser.add_argument('--data', default=DATA_PATH,
+                        help=f"Processed events file in output format {FORMAT_VERSION}, as written by "
+                             "fetch_gwosc_data.py; an older file must be regenerated by running it once "
+                             "(default: %(default)s)")
+    parser.add_argument('--all-versions', action='store_true',
+                        help="Match every catalog version instead of primary versions only")
+    parser.add_argument('--output', help="Output CSV file (default: standard output)")
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+
+    data = load_data(args.data)
+    try:
+        columns, rows, times = load_triggers(args.triggers, args.time_column)
+    except (OSError, ValueError) as e:
+        print(f"Error reading triggers: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.all_versions:
+        records = data['all_events']
+    else:
+        records = [data['all_events'][indices[0]] for indices in data['event_versions']]
+    pairs = TimeIndex(records).cross_match(times, args.window)
+
+    event_columns = ['event_name', 'event_full_name', 'event_catalog', 'event_gps_time', 'time_offset']
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(columns + event_columns)
+        for trigger, position, offset in pairs:
+            record = records[position]
+            writer.writerow([rows[trigger][column] for column in columns]
+                            + [record['name'], record['full_name'], record['catalog'], record['gps_time'],
+                               round(offset, 6)])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"{len(pairs)} pairs from {len(times)} triggers and {len(records)} events "
+          f"(window +/-{args.window:g} s)", file=sys.stderr)
+
+
+def main(argv=None):
+    """
+    Run the command named by the first argument.
+
+    Parameters:
+        argv (list): Command line arguments, defaults to sys.argv[1:]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    commands = {'serve': serve, 'crossmatch': crossmatch}
+    if not argv or argv[0] not in commands:
+        print(f"usage: gw_query.py {{{','.join(commands)}}} ...", file=sys.stderr)
+        sys.exit(2)
+    commands[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Local stand-in for the GWOSC API, for tests that exercise the HTTP layer.
+
+Serves fixed JSON documents with ETag validators and answers a matching
+If-None-Match with 304, like GWOSC does.
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        stub = self.server.stub
+        path = self.path.split('?')[0]
+        with stub.lock:
+            stub.requests.append((path, self.headers.get('If-None-Match')))
+            failing = stub.failures[path] > 0
+            if failing:
+                stub.failures[path] -= 1
+            body = stub.routes.get(path)
+
+        if failing:
+            return self._reply(503)
+        if body is None:
+            return self._reply(404)
+
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            return self._reply(304, headers={'ETag': etag})
+        self._reply(200, body, {'ETag': etag, 'Content-Type': 'application/json'})
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGWOSC:
+    """
+    Stand-in GWOSC server on a free local port, used as a context manager.
+
+    Parameters:
+        routes (dict): Maps a path to the object served there as JSON
+    """
+
+    def __init__(self, routes=None):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.requests = []  # (path, If-None-Match) of every request
+        self.failures = Counter()  # Path -> number of 503 replies left
+        for path, document in (routes or {}).items():
+            self.set(path, document)
+
+    def set(self, path, document):
+        """Serve a JSON document at path, replacing the previous one."""
+        with self.lock:
+            self.routes[path] = json.dumps(document).encode('utf-8')
+
+    def fail(self, path, times):
+        """Answer the next `times` requests for path with 503."""
+        with self.lock:
+            self.failures[path] = times
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def requested(self, path):
+        """If-None-Match headers of the requests for path so far."""
+        with self.lock:
+            return [validator for requested, validator in self.requests if requested == path]
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,184 @@
+"""
+Synthetic GWOSC-shaped catalogs, shared by the tests and the benchmarks.
+
+The output has the shape of the GWOSC allevents endpoint
+({"events": {full_name: {...}}}) with the fields fetch_gwosc_data.py reads,
+and mimics the real catalog: most events carry source-frame masses, a few
+only chirp mass and mass ratio, a few no masses at all; optional parameters
+are missing at roughly the real rates; many events appear in more than one
+catalog, and a large share of entries comes from excluded catalogs.
+
+benchmarks/synthetic.py writes these catalogs to disk.
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from fetch_gwosc_data import CATALOG_RULES, GPS_EPOCH, extract_event_parameters, np  # noqa: E402
+
+# Catalogs and how often an event appears in each (weights, not shares)
+CATALOG_WEIGHTS = {
+    'GWTC-4.0': 30,
+    'GWTC-3-confident': 12,
+    'GWTC-2.1-confident': 18,
+    'GWTC-1-confident': 4,
+    'O4_Discovery_Papers': 2,
+    'GWTC-2': 14,
+    'GWTC-3-marginal': 8,
+    'IAS-O3a': 8,
+    'O3_Discovery_Papers': 4,
+}
+
+# Number of catalogs an event name appears in, and how often
+VERSION_COUNTS = (1, 2, 3, 4)
+VERSION_WEIGHTS = (55, 30, 12, 3)
+
+# Share of events with the mass representations handled by the pipeline
+SOURCE_MASS_SHARE = 0.90
+CHIRP_MASS_SHARE = 0.05  # The rest has no usable masses
+
+# Probability that an optional parameter is published
+FIELD_PRESENCE = {
+    'network_matched_filter_snr': 0.98,
+    'luminosity_distance': 0.97,
+    'chi_eff': 0.95,
+    'total_mass_source': 0.93,
+    'chirp_mass_source': 0.97,
+    'redshift': 0.97,
+    'final_mass_source': 0.95,
+    'final_spin': 0.05,
+    'far': 0.94,
+    'p_astro': 0.9,
+}
+
+# GPS range of the observing runs so far (O1 to O4)
+GPS_RANGE = (1126051217.0, 1420878141.0)
+
+
+def _optional(rng, field, value):
+    """Return the value, or None as often as GWOSC omits the field."""
+    return value if rng.random() < FIELD_PRESENCE[field] else None
+
+
+def make_raw_event(rng, name, catalog, version, gps):
+    """
+    Build one raw event in the GWOSC allevents format.
+
+    Parameters:
+        rng (random.Random): Random source
+        name (str): Common event name
+        catalog (str): Catalog short name
+        version (int): Catalog version number
+        gps (float): GPS time of the event
+
+    Returns:
+        dict: Raw event
+    """
+    m1 = round(rng.lognormvariate(3.2, 0.6), 2)
+    if rng.random() < 0.05:
+        m1 = round(rng.uniform(1.1, 2.5), 2)  # Neutron star primaries are rare
+    m2 = round(m1 * rng.uniform(0.2, 1.0), 2)
+    q = m2 / m1
+    chirp_mass = round((m1 * m2) ** 0.6 / (m1 + m2) ** 0.2, 2)
+
+    event = {
+        'commonName': name,
+        'catalog.shortName': catalog,
+        'version': version,
+        'GPS': gps,
+        'jsonurl': f"https://gwosc.org/eventapi/json/{catalog}/{name}/v{version}/",
+        'mass_1_source': None,
+        'mass_2_source': None,
+        'mass_ratio': None,
+    }
+
+    draw = rng.random()
+    if draw < SOURCE_MASS_SHARE:
+        event['mass_1_source'] = m1
+        event['mass_2_source'] = m2
+    elif draw < SOURCE_MASS_SHARE + CHIRP_MASS_SHARE:
+        event['mass_ratio'] = round(q, 3)
+
+    distance = round(rng.uniform(40.0, 9000.0), 1)
+    event.update({
+        'network_matched_filter_snr': _optional(rng, 'network_matched_filter_snr', round(rng.uniform(8.0, 30.0), 1)),
+        'luminosity_distance': _optional(rng, 'luminosity_distance', distance),
+        'chi_eff': _optional(rng, 'chi_eff', round(rng.uniform(-0.5, 0.5), 2)),
+        'total_mass_source': _optional(rng, 'total_mass_source', round(m1 + m2, 1)),
+        'chirp_mass_source': _optional(rng, 'chirp_mass_source', chirp_mass),
+        'redshift': _optional(rng, 'redshift', round(distance / 4400.0, 2)),
+        'final_mass_source': _optional(rng, 'final_mass_source', round((m1 + m2) * 0.95, 1)),
+        'final_spin': _optional(rng, 'final_spin', round(rng.uniform(0.5, 0.9), 2)),
+        'far': _optional(rng, 'far', rng.choice((1e-5, 2.3e-3, 1.1e-1, 0.0))),
+        'p_astro': _optional(rng, 'p_astro', round(rng.uniform(0.5, 1.0), 2)),
+    })
+    return event
+
+
+def make_catalog(count, seed=0):
+    """
+    Generate a synthetic allevents catalog.
+
+    Parameters:
+        count (int): Number of entries (catalog versions), not event names
+        seed (int): Random seed, the same seed always gives the same catalog
+
+    Returns:
+        dict: {full_name: raw event}
+    """
+    rng = random.Random(seed)
+    catalogs = list(CATALOG_WEIGHTS)
+    weights = list(CATALOG_WEIGHTS.values())
+
+    events = {}
+    index = 0
+    while len(events) < count:
+        gps = round(rng.uniform(*GPS_RANGE), 1)
+        # Names follow the GWYYMMDD_hhmmss convention, made unique by index
+        date = time.strftime('%y%m%d', time.gmtime(gps + GPS_EPOCH))
+        name = f"GW{date}_{index:06d}"
+        index += 1
+
+        n_versions = rng.choices(VERSION_COUNTS, VERSION_WEIGHTS)[0]
+        chosen = set()
+        while len(chosen) < n_versions:
+            chosen.add(rng.choices(catalogs, weights)[0])
+
+        for version, catalog in enumerate(sorted(chosen), start=1):
+            if len(events) == count:
+                break
+            events[f"{name}-v{version}"] = make_raw_event(rng, name, catalog, version, gps)
+    return events
+
+
+def make_records(count, seed=0):
+    """
+    Generate the processed records of a synthetic catalog.
+
+    The catalog from make_catalog() goes through the pipeline's own
+    extraction (the columnar engine when NumPy is installed, the output is
+    identical), so entries without usable masses are dropped and the
+    records come in the order later stages receive them.
+
+    Parameters:
+        count (int): Number of catalog entries, slightly more than records
+        seed (int): Random seed
+
+    Returns:
+        list: GWEvent records, most recent first
+    """
+    engine = 'columnar' if np is not None else 'python'
+    with contextlib.redirect_stdout(io.StringIO()):
+        return extract_event_parameters(make_catalog(count, seed), engine=engine)
+
+
+def excluded_share(events):
+    """Fraction of entries coming from excluded catalogs."""
+    excluded = sum(CATALOG_RULES.is_excluded(e['catalog.shortName']) for e in events.values())
+    return excluded / len(events) if events else 0.0
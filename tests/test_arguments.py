@@ -0,0 +1,31 @@
+"""Command line combinations that parse_args() accepts or rejects."""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+
+
+class ArgumentsTest(unittest.TestCase):
+
+    def test_stream_rejects_options_that_need_every_event(self):
+        for flags in (['--per-catalog'], ['--details'], ['--engine', 'columnar']):
+            with self.subTest(flags=flags), contextlib.redirect_stderr(io.StringIO()) as stderr:
+                with self.assertRaises(SystemExit) as exit:
+                    pipeline.parse_args(['--stream'] + flags)
+                self.assertEqual(exit.exception.code, 2)
+                self.assertIn(flags[0], stderr.getvalue())
+
+    def test_stream_combines_with_incremental(self):
+        args = pipeline.parse_args(['--stream', '--incremental', '--compact'])
+        self.assertTrue(args.stream and args.incremental)
+
+
+if __name__ == '__main__':
+    unittest.main()
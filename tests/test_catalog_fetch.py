@@ -0,0 +1,137 @@
+"""Per-catalog downloads and detail-page enrichment, with a local stand-in for GWOSC."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from gwosc_stub import StubGWOSC  # noqa: E402
+from synthetic_catalog import make_catalog  # noqa: E402
+
+CATALOGS = '/eventapi/json/'
+CATALOG = '/eventapi/jsonfull/{catalog}/'
+RULES = pipeline.CatalogRules([('GWTC-*', 1)], exclude=['O3_Discovery_Papers'])
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def by_catalog(events):
+    catalogs = defaultdict(dict)
+    for name, data in events.items():
+        catalogs[data['catalog.shortName']][name] = data
+    return dict(catalogs)
+
+
+class CatalogFetchTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name) / 'cache'
+
+        self.catalogs = by_catalog(make_catalog(60))
+        self.stub = StubGWOSC({CATALOGS: {catalog: {} for catalog in self.catalogs}})
+        for catalog, events in self.catalogs.items():
+            self.stub.set(CATALOG.format(catalog=catalog), {'events': events})
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+    def fetch(self, **kwargs):
+        kwargs.setdefault('cache_dir', self.cache_dir)
+        events = quiet(pipeline.fetch_gwosc_events_by_catalog,
+                       catalogs_url=self.stub.url(CATALOGS),
+                       catalog_url=self.stub.url(CATALOG), rules=RULES, **kwargs)
+        pipeline.commit_http_cache(self.cache_dir)
+        return events
+
+    def test_catalogs_are_merged_without_the_excluded_ones(self):
+        events = self.fetch()
+
+        expected = {}
+        for catalog, catalog_events in self.catalogs.items():
+            if catalog != 'O3_Discovery_Papers':
+                expected.update(catalog_events)
+        self.assertEqual(events, expected)
+        self.assertEqual(self.stub.requested(CATALOG.format(catalog='O3_Discovery_Papers')), [])
+
+    def test_nothing_is_returned_when_every_catalog_is_unchanged(self):
+        self.fetch()
+        self.assertIsNone(self.fetch())
+
+        path = CATALOG.format(catalog='GWTC-2')
+        self.assertIsNotNone(self.stub.requested(path)[-1])
+
+    def test_one_changed_catalog_returns_all_events(self):
+        first = self.fetch()
+
+        changed = dict(self.catalogs['GWTC-2'])
+        name = next(iter(changed))
+        changed[name] = dict(changed[name], network_matched_filter_snr=99.0)
+        self.stub.set(CATALOG.format(catalog='GWTC-2'), {'events': changed})
+
+        events = self.fetch()
+        self.assertEqual(set(events), set(first))
+        self.assertEqual(events[name]['network_matched_filter_snr'], 99.0)
+
+
+class EventDetailTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = StubGWOSC()
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+        self.events = {}
+        for number, (name, data) in enumerate(make_catalog(6).items()):
+            path = f'/eventapi/json/{name}/'
+            detail = {'strain': [{'detector': 'L1'}, {'detector': 'H1'}, {'detector': 'H1'}]}
+            self.stub.set(path, {'events': {name: detail}})
+            self.events[name] = dict(data, jsonurl=self.stub.url(path))
+        self.paths = [f'/eventapi/json/{name}/' for name in self.events]
+
+    def enrich(self, **kwargs):
+        kwargs.setdefault('backoff', 0.01)
+        return quiet(pipeline.enrich_event_details, self.events, **kwargs)
+
+    def test_detectors_are_merged_into_the_events(self):
+        self.enrich()
+        for data in self.events.values():
+            self.assertEqual(data['detectors'], ['H1', 'L1'])
+
+    def test_transient_failures_are_retried(self):
+        self.stub.fail(self.paths[0], 2)
+        self.enrich(retries=2)
+
+        self.assertEqual(len(self.stub.requested(self.paths[0])), 3)
+        self.assertTrue(all('detectors' in data for data in self.events.values()))
+
+    def test_missing_pages_are_not_retried_and_leave_the_event_as_is(self):
+        name = next(iter(self.events))
+        self.stub.routes.pop(self.paths[0])
+        self.enrich(retries=3)
+
+        self.assertEqual(len(self.stub.requested(self.paths[0])), 1)
+        self.assertNotIn('detectors', self.events[name])
+        self.assertEqual(sum('detectors' in data for data in self.events.values()), len(self.events) - 1)
+
+    def test_pages_still_failing_after_the_retries_are_skipped(self):
+        name = next(iter(self.events))
+        self.stub.fail(self.paths[0], 5)
+        self.enrich(retries=1)
+
+        self.assertEqual(len(self.stub.requested(self.paths[0])), 2)
+        self.assertNotIn('detectors', self.events[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""Catalog priority and exclusion rules (CatalogRules, src/catalog_rules.json)."""
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+
+
+class CatalogRulesTest(unittest.TestCase):
+
+    def test_first_matching_pattern_wins(self):
+        rules = pipeline.CatalogRules([('GWTC-3-*', 90), ('GWTC-*-confident', 50), ('GWTC-*', 10)])
+        self.assertEqual(rules.rank('GWTC-3-confident'), 90)
+        self.assertEqual(rules.rank('GWTC-2.1-confident'), 50)
+        self.assertEqual(rules.rank('GWTC-2'), 10)
+
+        reordered = pipeline.CatalogRules([('GWTC-*', 10), ('GWTC-*-confident', 50), ('GWTC-3-*', 90)])
+        self.assertEqual(reordered.rank('GWTC-3-confident'), 10)
+
+    def test_exclusions_are_checked_before_priorities(self):
+        rules = pipeline.CatalogRules([('GWTC-*-confident', 50), ('GWTC-3-marginal', 90)],
+                                      exclude=['GWTC-*-marginal', 'GWTC-2.1-confident'])
+        self.assertIsNone(rules.rank('GWTC-3-marginal'))
+        self.assertIsNone(rules.rank('GWTC-2.1-confident'))
+        self.assertTrue(rules.is_excluded('GWTC-3-marginal'))
+        self.assertEqual(rules.rank('GWTC-3-confident'), 50)
+        self.assertFalse(rules.is_excluded('GWTC-3-confident'))
+
+    def test_default_rank(self):
+        rules = pipeline.CatalogRules([('GWTC-*-confident', 50)], default_rank=-1)
+        self.assertEqual(rules.rank('IAS-O3a'), -1)
+        self.assertEqual(pipeline.CatalogRules([('GWTC-*-confident', 50)]).rank('IAS-O3a'), 0)
+
+    def test_patterns_are_case_sensitive_and_literal_outside_wildcards(self):
+        rules = pipeline.CatalogRules([('GWTC-2.1-confident', 80)])
+        self.assertEqual(rules.rank('gwtc-2.1-confident'), 0)
+        self.assertEqual(rules.rank('GWTC-201-confident'), 0)
+
+    def test_ranks_are_memoized(self):
+        rules = pipeline.CatalogRules([('GWTC-4.0', 100), ('GWTC-*-confident', 50)], exclude=['GWTC-2'])
+        self.assertEqual(rules.ranks, {'GWTC-2': None, 'GWTC-4.0': 100})
+        rules.rank('GWTC-3-confident')
+        self.assertEqual(rules.ranks['GWTC-3-confident'], 50)
+
+    def test_shipped_rules(self):
+        rules = pipeline.CatalogRules.from_file()
+        self.assertEqual(rules.rank('GWTC-4.0'), 100)
+        self.assertTrue(rules.is_excluded('GWTC-2'))
+        self.assertGreater(rules.rank('GWTC-3-confident'), rules.rank('GWTC-2.1-confident'))
+
+
+class RulesFileTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.path = self.tmp / 'rules.json'
+
+    def load(self, config):
+        self.path.write_text(config if isinstance(config, str) else json.dumps(config), encoding='utf-8')
+        return pipeline.CatalogRules.from_file(self.path)
+
+    def test_file_is_loaded_in_order(self):
+        rules = self.load({
+            'exclude': ['GWTC-*-marginal'],
+            'priority': [{'pattern': 'GWTC-3-*', 'rank': 90}, {'pattern': 'GWTC-*-confident', 'rank': 50}],
+            'default_rank': 5,
+        })
+        self.assertEqual([rules.rank(c) for c in ('GWTC-3-confident', 'GWTC-1-confident', 'GWTC-3-marginal', 'X')],
+                         [90, 50, None, 5])
+
+    def test_bad_files_are_rejected(self):
+        bad = {
+            'not JSON': '{"priority": [',
+            'no priority': {'exclude': []},
+            'rule without rank': {'priority': [{'pattern': 'GWTC-*'}]},
+            'rank not a number': {'priority': [{'pattern': 'GWTC-*', 'rank': 'high'}]},
+            'rule not an object': {'priority': ['GWTC-*']},
+            'exclude not a list': {'priority': [], 'exclude': 'GWTC-2'},
+            'pattern not a string': {'priority': [{'pattern': 3, 'rank': 1}]},
+            'not an object': '[]',
+        }
+        for name, config in bad.items():
+            with self.subTest(name), self.assertRaises(ValueError):
+                self.load(config)
+
+    def test_pipeline_stops_on_bad_rules(self):
+        self.path.write_text('{"priority": [', encoding='utf-8')
+        argv = ['--rules', str(self.path), '--output', str(self.tmp / 'gw_events.json'), '--no-snapshot',
+                '--url', 'http://127.0.0.1:9/', '--cache-dir', str(self.tmp / 'cache')]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(pipeline.main(argv), 'error')
+        self.assertFalse((self.tmp / 'gw_events.json').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
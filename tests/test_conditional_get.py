@@ -0,0 +1,118 @@
+"""Conditional GET against the HTTP cache, with a local stand-in for GWOSC."""
+
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from gwosc_stub import StubGWOSC  # noqa: E402
+from synthetic_catalog import make_catalog  # noqa: E402
+
+ALLEVENTS = '/eventapi/json/allevents/'
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+class ConditionalGetTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.cache_dir = self.tmp / 'cache'
+        self.stub = StubGWOSC({ALLEVENTS: {'events': make_catalog(40)}})
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+    def fetch(self, commit=True, **kwargs):
+        kwargs.setdefault('cache_dir', self.cache_dir)
+        events = quiet(pipeline.fetch_gwosc_events, self.stub.url(ALLEVENTS), **kwargs)
+        if kwargs.get('stream') and events is not None:
+            events = quiet(dict, events)
+        if commit:
+            pipeline.commit_http_cache(self.cache_dir)
+        return events
+
+    def test_unchanged_catalog_is_not_downloaded_again(self):
+        first = self.fetch()
+        self.assertEqual(len(first), 40)
+        self.assertIsNone(self.fetch())
+
+        validators = self.stub.requested(ALLEVENTS)
+        self.assertIsNone(validators[0])
+        self.assertIsNotNone(validators[1])
+
+    def test_changed_catalog_is_downloaded(self):
+        self.fetch()
+        self.stub.set(ALLEVENTS, {'events': make_catalog(41)})
+        self.assertEqual(len(self.fetch()), 41)
+
+    def test_streamed_response_is_cached_too(self):
+        self.assertEqual(len(self.fetch(stream=True)), 40)
+        self.assertIsNone(self.fetch(stream=True))
+
+    def test_uncommitted_responses_are_not_revalidated(self):
+        self.fetch(commit=False)
+        pipeline.discard_http_cache_updates(self.cache_dir)
+        self.assertEqual(len(self.fetch()), 40)
+        self.assertIsNone(self.stub.requested(ALLEVENTS)[1])
+
+    def test_without_revalidation_the_full_catalog_is_fetched(self):
+        self.fetch()
+        self.assertEqual(len(self.fetch(revalidate=False)), 40)
+        self.assertIsNone(self.stub.requested(ALLEVENTS)[1])
+
+    def argv(self, *flags):
+        return ['--url', self.stub.url(ALLEVENTS), '--cache-dir', str(self.cache_dir), '--no-snapshot',
+                '--output', str(self.tmp / 'out' / 'gw_events.json')] + list(flags)
+
+    def run_main(self, *flags):
+        return quiet(pipeline.main, self.argv(*flags))
+
+    def test_main_stops_on_304(self):
+        self.run_main('--metrics')
+        self.run_main('--metrics')
+        report = pipeline.load_output(self.tmp / 'out' / pipeline.RUN_METRICS_NAME)
+        self.assertEqual(report['status'], 'not_modified')
+
+    def test_newly_requested_artifact_is_written_despite_304(self):
+        self.run_main()
+        self.run_main('--sqlite')
+        self.assertTrue((self.tmp / 'out' / 'gw_events.sqlite').exists())
+        self.assertIsNone(self.stub.requested(ALLEVENTS)[1])
+
+    def test_failed_run_does_not_cache_the_response(self):
+        massless = {name: dict(event, mass_1_source=None, mass_2_source=None, mass_ratio=None)
+                    for name, event in make_catalog(40).items()}
+        self.stub.set(ALLEVENTS, {'events': massless})
+        self.assertEqual(self.run_main(), 'no_valid_events')
+        self.assertEqual(self.run_main(), 'no_valid_events')
+        self.assertEqual(self.stub.requested(ALLEVENTS), [None, None])
+
+        self.stub.set(ALLEVENTS, {'events': make_catalog(40)})
+        self.assertEqual(self.run_main(), 'ok')
+        self.assertEqual(self.run_main(), 'not_modified')
+
+    def test_failed_run_exits_non_zero(self):
+        self.stub.set(ALLEVENTS, {'events': {}})
+        script = ROOT / 'src' / 'fetch_gwosc_data.py'
+        result = subprocess.run([sys.executable, str(script)] + self.argv(), capture_output=True, cwd=self.tmp)
+        self.assertEqual(result.returncode, 1)
+
+        self.stub.set(ALLEVENTS, {'events': make_catalog(40)})
+        result = subprocess.run([sys.executable, str(script)] + self.argv(), capture_output=True, cwd=self.tmp)
+        self.assertEqual(result.returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""deduplicate_events() must pick the primaries a stable sort by rank would."""
+
+import contextlib
+import io
+import random
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from synthetic_catalog import make_records  # noqa: E402
+
+# Two ranked catalogs tie, two are unranked and one is excluded
+RULES = pipeline.CatalogRules(
+    [('GWTC-4.0', 3), ('GWTC-*-confident', 2), ('O4_Discovery_Papers', 2)],
+    exclude=['GWTC-2'])
+CATALOGS = ['GWTC-4.0', 'GWTC-3-confident', 'GWTC-2.1-confident', 'O4_Discovery_Papers',
+            'IAS-O3a', 'Unlisted', 'GWTC-2']
+
+
+def sorted_deduplicate(events, rules):
+    """The sort-based deduplication deduplicate_events() replaced."""
+    filtered_events = [event for event in events if not rules.is_excluded(event.catalog)]
+    by_name = {}
+    for event in filtered_events:
+        by_name.setdefault(event.name, []).append(event)
+    unique = {}
+    for name, versions in by_name.items():
+        versions = sorted(versions, key=lambda event: rules.rank(event.catalog), reverse=True)
+        unique[name] = {'primary': versions[0], 'all_versions': versions, 'version_count': len(versions)}
+    return filtered_events, unique
+
+
+def random_versions(seed, names=300):
+    """Events with up to five versions each, arriving in random order."""
+    rng = random.Random(seed)
+    events = []
+    for number in range(names):
+        for version in range(rng.randint(1, 5)):
+            events.append(pipeline.GWEvent(
+                name=f"GW{number:06d}", full_name=f"GW{number:06d}-v{version}", m1=30.0, m2=20.0,
+                snr=10.0, source_type='BBH', color='#9b59b6', detection_date='2019-01-01',
+                catalog=rng.choice(CATALOGS), version=version, gps_time=1.2e9 + number))
+    rng.shuffle(events)
+    return events
+
+
+class DeduplicateTest(unittest.TestCase):
+
+    def assertSameAsSorted(self, events, rules):
+        with contextlib.redirect_stdout(io.StringIO()):
+            filtered, unique = pipeline.deduplicate_events(events, rules)
+        expected_filtered, expected_unique = sorted_deduplicate(events, rules)
+
+        self.assertEqual([id(event) for event in filtered], [id(event) for event in expected_filtered])
+        self.assertEqual(list(unique), list(expected_unique))
+        for name, data in expected_unique.items():
+            self.assertIs(unique[name]['primary'], data['primary'], name)
+            self.assertEqual([id(v) for v in unique[name]['all_versions']],
+                             [id(v) for v in data['all_versions']], name)
+            self.assertEqual(unique[name]['version_count'], data['version_count'])
+
+    def test_ties_and_unranked_catalogs(self):
+        for seed in range(5):
+            with self.subTest(seed=seed):
+                self.assertSameAsSorted(random_versions(seed), RULES)
+
+    def test_only_unranked_catalogs(self):
+        self.assertSameAsSorted(random_versions(5), pipeline.CatalogRules([], exclude=['GWTC-2']))
+
+    def test_default_rules_on_a_synthetic_catalog(self):
+        self.assertSameAsSorted(make_records(3000), pipeline.CATALOG_RULES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Deltas between output versions and the index chain clients follow."""
+
+import contextlib
+import copy
+import io
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from synthetic_catalog import make_records  # noqa: E402
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def revise(records, seed):
+    """Drop, add and change a few records, as a GWOSC update would."""
+    rng = random.Random(seed)
+    records = [pipeline.GWEvent.from_dict(record.to_dict()) for record in records]
+    for _ in range(3):
+        records.pop(rng.randrange(len(records)))
+    for record in rng.sample(records, 3):
+        record.snr = round(rng.uniform(8.0, 30.0), 1)
+    for number, record in enumerate(make_records(3, seed=seed + 100)):
+        record.full_name = f"{record.full_name}-revision{seed}-{number}"
+        records.append(record)
+    return records
+
+
+class DeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = Path(tmp.name) / 'gw_events.json'
+        quiet(pipeline.save_data, make_records(200), self.output)
+        self.previous = pipeline.load_output(self.output)
+
+    def assertRoundTrip(self, data):
+        data['content_hash'] = pipeline.content_hash(data)
+        delta = pipeline.make_delta(self.previous, data)
+        self.assertEqual(pipeline.apply_delta(self.previous, delta), data)
+        return delta
+
+    def test_added_removed_changed_and_reordered_events(self):
+        data = copy.deepcopy(self.previous)
+        events = data['all_events']
+        removed = [events.pop(7)['full_name'], events.pop(40)['full_name']]
+        events[3]['snr'] = 99.9
+        events[90]['detectors'] = ['H1', 'V1']
+        changed = [events[3]['full_name'], events[90]['full_name']]
+        events[10:30] = reversed(events[10:30])
+        events[50], events[-5] = events[-5], events[50]
+        added = dict(events[0], full_name='GW000000_000000-v1', m1=12.3)
+        events.insert(60, added)
+
+        delta = self.assertRoundTrip(data)
+        self.assertEqual(delta['added'], [added['full_name']])
+        self.assertEqual(sorted(delta['changed']), sorted(changed))
+        self.assertEqual(sorted(delta['removed']), sorted(removed))
+
+    def test_unchanged_events_are_sent_as_runs(self):
+        data = copy.deepcopy(self.previous)
+        data['all_events'][100]['snr'] = 99.9
+
+        delta = self.assertRoundTrip(data)
+        self.assertEqual(delta['all_events'], [[0, 100], data['all_events'][100], [101, len(data['all_events']) - 101]])
+
+    def test_empty_and_replaced_outputs(self):
+        self.assertRoundTrip(dict(self.previous, all_events=[], event_versions=[]))
+        renamed = [dict(event, full_name=event['full_name'] + '-new') for event in self.previous['all_events']]
+        self.assertRoundTrip(dict(self.previous, all_events=renamed))
+
+    def test_delta_from_another_version_is_rejected(self):
+        data = copy.deepcopy(self.previous)
+        data['all_events'].pop()
+        data['content_hash'] = pipeline.content_hash(data)
+        delta = pipeline.make_delta(self.previous, data)
+        with self.assertRaises(ValueError):
+            pipeline.apply_delta(data, delta)
+
+
+class DeltaIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = Path(tmp.name) / 'gw_events.json'
+        self.delta_dir = self.output.parent / pipeline.DELTA_DIR_NAME
+
+    def run_versions(self, count, compact=False):
+        versions = []
+        records = make_records(200)
+        for seed in range(count):
+            if seed:
+                records = revise(records, seed)
+            quiet(pipeline.save_data, records, self.output, compact=compact, deltas=True)
+            versions.append(pipeline.load_output(self.output))
+        self.records = records
+        return versions
+
+    def follow(self, data):
+        """Patch an old output up to the latest one, like docs/script.js does."""
+        index = pipeline.load_output(self.delta_dir / 'index.json')
+        steps = 0
+        while data['content_hash'] != index['latest']:
+            entry = index['deltas'][data['content_hash']]
+            data = pipeline.apply_delta(data, pipeline.load_output(self.delta_dir / entry['file']))
+            steps += 1
+        return data, steps
+
+    def test_every_version_reaches_the_latest(self):
+        versions = self.run_versions(5, compact=True)
+        for age, version in enumerate(reversed(versions)):
+            with self.subTest(age=age):
+                data, steps = self.follow(version)
+                self.assertEqual(steps, age)
+                self.assertEqual(data, versions[-1])
+
+    def test_only_the_last_deltas_are_kept(self):
+        with mock.patch.object(pipeline, 'DELTA_HISTORY', 2):
+            versions = self.run_versions(5)
+
+        index = pipeline.load_output(self.delta_dir / 'index.json')
+        self.assertEqual(list(index['deltas']), [version['content_hash'] for version in versions[2:4]])
+        self.assertEqual(sorted(path.name for path in self.delta_dir.glob('delta-*')),
+                         sorted(entry['file'] for entry in index['deltas'].values()))
+        self.assertEqual(self.follow(versions[2])[0], versions[-1])
+
+    def test_unchanged_run_keeps_the_index(self):
+        self.run_versions(2)
+        index = (self.delta_dir / 'index.json').read_bytes()
+        quiet(pipeline.save_data, self.records, self.output, deltas=True)
+        self.assertEqual((self.delta_dir / 'index.json').read_bytes(), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Incremental runs must produce exactly what a full run does."""
+
+import contextlib
+import copy
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from synthetic_catalog import make_catalog  # noqa: E402
+
+ENGINES = ['python'] + (['columnar'] if pipeline.np is not None else [])
+
+
+def quiet(func, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+class IncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = Path(tmp.name) / 'gw_events.json'
+        self.events = make_catalog(300)
+
+    def full_run(self, events, engine, details=False):
+        records = quiet(pipeline.extract_event_parameters, events, engine=engine, details=details)
+        quiet(pipeline.save_data, records, self.output)
+        return pipeline.load_output(self.output)['all_events']
+
+    def incremental_run(self, events, engine, details=False):
+        previous = quiet(pipeline.load_previous_events, self.output)
+        self.assertTrue(previous)
+        records = quiet(pipeline.extract_event_parameters, events, engine=engine,
+                        previous=previous, details=details)
+        quiet(pipeline.save_data, records, self.output)
+        return pipeline.load_output(self.output)['all_events']
+
+    def assertSameAsFullRun(self, before, after, engine, details=False):
+        self.full_run(before, engine)
+        incremental = self.incremental_run(after, engine, details)
+        self.assertEqual(incremental, self.full_run(after, engine, details))
+
+    def test_in_place_changes(self):
+        after = copy.deepcopy(self.events)
+        names = list(after)
+        after[names[0]]['mass_1_source'] = 81.5
+        after[names[1]]['network_matched_filter_snr'] = 42.0
+        after[names[2]]['catalog.shortName'] = 'GWTC-3-confident'
+        after[names[3]]['GPS'] += 1.0
+        after[names[4]].pop('luminosity_distance', None)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertSameAsFullRun(self.events, after, engine)
+
+    def test_added_and_removed_versions(self):
+        after = copy.deepcopy(self.events)
+        removed, template = list(after)[:2]
+        del after[removed]
+        after[template.rsplit('-v', 1)[0] + '-v9'] = dict(after[template], version=9)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertSameAsFullRun(self.events, after, engine)
+
+    def test_enabling_details(self):
+        after = copy.deepcopy(self.events)
+        for number, event in enumerate(after.values()):
+            if number % 3:
+                event['detectors'] = ['H1', 'L1']
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertSameAsFullRun(self.events, after, engine, details=True)
+                self.assertTrue(any('detectors' in record for record in pipeline.load_output(self.output)['all_events']))
+
+    def test_unchanged_records_are_reused(self):
+        self.full_run(self.events, 'python')
+        previous = quiet(pipeline.load_previous_events, self.output)
+        name = next(iter(previous))
+        previous[name]['snr'] = -1.0
+
+        records = quiet(pipeline.extract_event_parameters, self.events, previous=previous)
+        self.assertEqual({record.full_name: record.snr for record in records}[name], -1.0)
+
+    def test_streamed_events(self):
+        self.full_run(self.events, 'python')
+        after = copy.deepcopy(self.events)
+        after[next(iter(after))]['mass_2_source'] = 1.2
+        incremental = self.incremental_run(iter(after.items()), 'python')
+        self.assertEqual(incremental, self.full_run(after, 'python'))
+
+
+if __name__ == '__main__':
+    unittest.main()
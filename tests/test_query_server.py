@@ -0,0 +1,149 @@
+"""Query server and cross-match commands over a processed synthetic catalog."""
+
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+import gw_query  # noqa: E402
+from synthetic_catalog import make_records  # noqa: E402
+
+
+class QueryServerTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.output = self.tmp / 'gw_events.json'
+        with contextlib.redirect_stdout(io.StringIO()):
+            pipeline.save_data(make_records(300), self.output)
+        self.data = pipeline.load_output(self.output)
+        self.service = gw_query.CatalogService(gw_query.EventIndex(self.data))
+
+    def query(self, path, query=''):
+        status, body = self.service.handle(path, query)
+        return status, json.loads(body)
+
+    def test_reads_the_current_output_format(self):
+        self.assertEqual(gw_query.FORMAT_VERSION, pipeline.OUTPUT_FORMAT_VERSION)
+
+    def test_range_filters(self):
+        status, body = self.query('/events', 'snr_min=20&limit=1000')
+        self.assertEqual(status, 200)
+        self.assertTrue(body['events'])
+        self.assertTrue(all(event['snr'] >= 20 for event in body['events']))
+
+    def test_non_finite_bounds_are_rejected(self):
+        for query in ('snr_min=nan', 'snr_max=inf', 'm1_min=-Infinity', 'gps_time_min=NaN&gps_time_max=1'):
+            status, body = self.query('/events', query)
+            self.assertEqual(status, 400, query)
+            self.assertIn('finite', body['error'])
+
+    def test_equivalent_queries_share_a_cache_entry(self):
+        catalogs = sorted({event['catalog'] for event in self.data['all_events']})[:2]
+        queries = [
+            f"catalog={catalogs[0]},{catalogs[1]}&m1_min=20&limit=5",
+            f"limit=5&m1_min=20&catalog={catalogs[1]},{catalogs[0]}",
+            f"catalog={catalogs[1]}&m1_min=20&catalog={catalogs[0]},{catalogs[1]}&limit=5",
+            f"catalog={catalogs[0]},,{catalogs[0]},{catalogs[1]}&limit=5&m1_min=20",
+        ]
+        bodies = [self.service.handle('/events', query)[1] for query in queries]
+        self.assertEqual(len(set(bodies)), 1)
+
+        info = self.service.respond.cache_info()
+        self.assertEqual((info.misses, info.hits, info.currsize), (1, len(queries) - 1, 1))
+
+    def test_repeated_range_parameters_are_rejected(self):
+        status, body = self.query('/events', 'm1_min=20&m1_min=30')
+        self.assertEqual(status, 400)
+        self.assertIn('more than once', body['error'])
+
+    def test_paging_and_sorting(self):
+        _, everything = self.query('/events', 'sort=-m1')
+        masses = [event['m1'] for event in everything['events']]
+        self.assertEqual(masses, sorted(masses, reverse=True))
+        self.assertEqual(everything['count'], len(self.data['all_events']))
+
+        pages = []
+        for offset in range(0, everything['count'], 40):
+            _, page = self.query('/events', f'sort=-m1&limit=40&offset={offset}')
+            self.assertEqual((page['count'], page['offset']), (everything['count'], offset))
+            pages.extend(page['events'])
+        self.assertEqual(pages, everything['events'])
+
+        self.assertEqual(self.query('/events', f"offset={everything['count']}")[1]['events'], [])
+        for query in ('limit=-1', 'offset=x', 'sort=color'):
+            self.assertEqual(self.query('/events', query)[0], 400, query)
+
+    def test_event_versions(self):
+        indices = max(self.data['event_versions'], key=len)
+        self.assertGreater(len(indices), 1)
+        name = self.data['all_events'][indices[0]]['name']
+
+        status, body = self.query(f'/events/{name}')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['versions'], [self.data['all_events'][i] for i in indices])
+        self.assertEqual(self.query('/events/GW000000_000000')[0], 404)
+
+    def test_aggregate(self):
+        status, body = self.query('/aggregate', 'group_by=source_type&primary=1')
+        self.assertEqual(status, 200)
+        primaries = [self.data['all_events'][indices[0]] for indices in self.data['event_versions']]
+        self.assertEqual(body['count'], len(primaries))
+        self.assertEqual(sum(group['count'] for group in body['groups'].values()), len(primaries))
+
+        bbh = [event for event in primaries if event['source_type'] == 'BBH']
+        stats = body['groups']['BBH']
+        self.assertEqual(stats['count'], len(bbh))
+        self.assertEqual(stats['m1']['min'], min(event['m1'] for event in bbh))
+        self.assertEqual(stats['m1']['max'], max(event['m1'] for event in bbh))
+        self.assertAlmostEqual(stats['m1']['mean'], sum(event['m1'] for event in bbh) / len(bbh), places=6)
+
+        self.assertEqual(self.query('/aggregate', 'group_by=m1')[0], 400)
+        self.assertEqual(self.query('/aggregate', 'limit=5')[0], 400)
+
+    def test_http_front_end(self):
+        server = gw_query.ThreadingHTTPServer(('127.0.0.1', 0), gw_query.CatalogRequestHandler)
+        server.service = self.service
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05})
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        url = f"http://127.0.0.1:{server.server_port}/events?primary=1&limit=3"
+        with urllib.request.urlopen(url) as response:
+            self.assertEqual(response.headers['Content-Type'], 'application/json')
+            body = json.loads(response.read())
+        self.assertEqual(body, self.query('/events', 'primary=1&limit=3')[1])
+
+    def test_serve_exits_non_zero_without_usable_data(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as exit:
+            gw_query.serve(['--data', str(self.tmp / 'missing.json'), '--port', '0'])
+        self.assertEqual(exit.exception.code, 1)
+
+    def test_crossmatch_exits_non_zero_on_errors(self):
+        triggers = self.tmp / 'triggers.csv'
+        triggers.write_text('id,gps_time\ngrb,1.2e9\n', encoding='utf-8')
+        runs = (
+            [str(triggers), '--window', '10', '--data', str(self.tmp / 'missing.json')],
+            [str(self.tmp / 'missing.csv'), '--window', '10', '--data', str(self.output)],
+        )
+        for argv in runs:
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as exit:
+                gw_query.crossmatch(argv)
+            self.assertEqual(exit.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
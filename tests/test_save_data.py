@@ -0,0 +1,148 @@
+"""Artifacts written by save_data() must always match the JSON they sit next to."""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import fetch_gwosc_data as pipeline  # noqa: E402
+from synthetic_catalog import make_catalog  # noqa: E402
+
+
+def records(count, seed=0):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return pipeline.extract_event_parameters(make_catalog(count, seed=seed))
+
+
+class SaveDataTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.output = Path(tmp.name) / 'gw_events.json'
+
+    def save(self, events, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return pipeline.save_data(events, self.output, **kwargs)
+
+    @unittest.skipIf(pipeline.brotli is None, "needs brotli for the first run")
+    def test_stale_brotli_copies_are_removed_without_brotli(self):
+        self.save(records(200), compact=True, shards=True)
+        self.assertTrue(self.output.with_name('gw_events.json.br').exists())
+
+        with mock.patch.object(pipeline, 'brotli', None):
+            self.save(records(210), compact=True, shards=True)
+
+        self.assertFalse(self.output.with_name('gw_events.json.br').exists())
+        self.assertEqual(list(self.output.parent.rglob('*.br')), [])
+        self.assertTrue(self.output.with_name('gw_events.json.gz').exists())
+
+    def test_indented_output_removes_compressed_copies(self):
+        self.save(records(200), compact=True, shards=True)
+        self.save(records(210), shards=True)
+
+        self.assertEqual(list(self.output.parent.rglob('*.gz')), [])
+        self.assertEqual(list(self.output.parent.rglob('*.br')), [])
+
+    def test_hashed_copy_only_includes_files_written_this_run(self):
+        events = records(200)
+        self.save(events)
+        stale = self.output.with_name('gw_events.json.gz')
+        stale.write_bytes(b'left over from another run')
+
+        self.save(events, hashed=True)
+
+        pointer = pipeline.load_output(self.output.with_name(pipeline.LATEST_POINTER_NAME))
+        self.assertEqual(pointer['encodings'], {})
+        self.assertEqual(list(self.output.parent.glob('gw_events.*.json.gz')), [])
+        self.assertEqual(self.output.with_name(pointer['file']).read_bytes(), self.output.read_bytes())
+
+    def snapshot(self):
+        return {path.relative_to(self.output.parent): (path.read_bytes(), path.stat().st_mtime_ns)
+                for path in sorted(self.output.parent.rglob('*')) if path.is_file()}
+
+    def test_unchanged_events_leave_every_artifact_untouched(self):
+        flags = dict(compact=True, shards=True, hashed=True, deltas=True, sqlite=True)
+        self.save(records(200), **flags)
+        events = records(210)
+        self.assertTrue(self.save(events, **flags))
+        updated = pipeline.load_output(self.output)['updated']
+
+        # Back-date everything, so any rewrite shows up in the mtimes
+        for path in self.output.parent.rglob('*'):
+            os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        before = self.snapshot()
+        self.assertTrue(any(name.parts[0] == pipeline.DELTA_DIR_NAME for name in before))
+        self.assertTrue(any(name.parts[0] == pipeline.SHARD_DIR_NAME for name in before))
+        self.assertIn(Path(pipeline.LATEST_POINTER_NAME), before)
+
+        self.assertFalse(self.save(events, **flags))
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(pipeline.load_output(self.output)['updated'], updated)
+
+        # A forced save rewrites the files but keeps the timestamp
+        self.save(events, force=True, **flags)
+        self.assertEqual(pipeline.load_output(self.output)['updated'], updated)
+        self.assertNotEqual(self.output.stat().st_mtime_ns, 1_000_000_000)
+
+    def shard_files(self):
+        return sorted(path.name for path in (self.output.parent / pipeline.SHARD_DIR_NAME).glob('*.json'))
+
+    def test_hashed_shards_are_named_after_their_content(self):
+        shard_dir = self.output.parent / pipeline.SHARD_DIR_NAME
+        named = []
+        for count in (200, 210, 220):
+            self.save(records(count), shards=True, hashed=True)
+            named.append(pipeline._shard_files(pipeline.load_output(shard_dir / 'manifest.json')))
+
+        for name in named[-1]:
+            shard = pipeline.load_output(shard_dir / name)
+            self.assertEqual(name, pipeline._hashed_shard_name(name.rsplit('.', 2)[0] + '.json', shard))
+
+        # Shards of the previous manifest stay for one more run, older ones go
+        self.assertEqual(set(self.shard_files()), named[-1] | named[-2] | {'manifest.json'})
+        self.assertTrue(named[0] - named[1] - named[2])
+
+    def test_toggling_hashed_rewrites_unchanged_shards(self):
+        events = records(200)
+        self.save(events, shards=True)
+        self.assertIn('primaries.json', self.shard_files())
+
+        self.save(events, shards=True, hashed=True)
+        manifest = pipeline.load_output(self.output.parent / pipeline.SHARD_DIR_NAME / 'manifest.json')
+        self.assertNotEqual(manifest['primaries']['file'], 'primaries.json')
+
+        self.save(events, shards=True)
+        self.assertEqual(self.shard_files(), sorted(
+            ['manifest.json', 'primaries.json'] + [pipeline._shard_file_name(c) for c in manifest['catalogs']]))
+
+    def test_unknown_detectors_are_left_out_of_every_record(self):
+        self.save(records(200), deltas=True)
+        events = records(210)
+        events[0].detectors = ['H1', 'L1']
+        self.save(events, shards=True, deltas=True)
+
+        data = pipeline.load_output(self.output)
+        self.assertEqual(data['all_events'][0]['detectors'], ['H1', 'L1'])
+        self.assertTrue(all('detectors' not in event for event in data['all_events'][1:]))
+
+        files = list(self.output.parent.glob('shards/*.json')) + list(self.output.parent.glob('deltas/delta-*.json'))
+        self.assertTrue(files)
+        for path in files:
+            text = path.read_text(encoding='utf-8')
+            self.assertNotIn('"detectors": null', text)
+            self.assertNotIn('"detectors":null', text)
+
+        for event in data['all_events']:
+            self.assertEqual(pipeline.GWEvent.from_dict(event).to_dict(), event)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""TimeIndex must agree with a brute-force scan, with and without NumPy."""
+
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'src'))
+
+import gw_query  # noqa: E402
+
+BACKENDS = ['bisect'] + (['numpy'] if gw_query.np is not None else [])
+
+
+def random_records(rng, count):
+    """Records on a coarse time grid, so ties and exact window edges occur."""
+    records = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            gps_time = None
+        elif rng.random() < 0.5:
+            gps_time = float(rng.randrange(1000))
+        else:
+            gps_time = rng.uniform(0.0, 1000.0)
+        records.append({'gps_time': gps_time})
+    return records
+
+
+def brute_force_window(records, start_time, end_time):
+    hits = [(record['gps_time'], position) for position, record in enumerate(records)
+            if record['gps_time'] is not None and start_time <= record['gps_time'] <= end_time]
+    return [position for _, position in sorted(hits)]
+
+
+def brute_force_cross_match(records, trigger_times, window):
+    pairs = []
+    for trigger, trigger_time in enumerate(trigger_times):
+        for position in brute_force_window(records, trigger_time - window, trigger_time + window):
+            pairs.append((trigger, position, records[position]['gps_time'] - trigger_time))
+    return pairs
+
+
+class TimeIndexTest(unittest.TestCase):
+
+    def backends(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                if backend == 'numpy':
+                    yield
+                else:
+                    with mock.patch.object(gw_query, 'np', None):
+                        yield
+
+    def test_window_matches_a_brute_force_scan(self):
+        rng = random.Random(1)
+        records = random_records(rng, 500)
+        windows = [(rng.randrange(-50, 1050), rng.randrange(0, 200)) for _ in range(200)]
+        windows += [(10.0, 10.0), (500.0, 499.0), (-5.0, -1.0), (1001.0, 2000.0)]
+        for _ in self.backends():
+            index = gw_query.TimeIndex(records)
+            for start, length in windows:
+                self.assertEqual(index.window(start, start + length),
+                                 brute_force_window(records, start, start + length))
+
+    def test_cross_match_matches_a_nested_loop(self):
+        rng = random.Random(2)
+        for count, trigger_count, window in ((500, 300, 3.0), (500, 50, 0.0), (40, 20, 400.0), (0, 5, 1.0)):
+            records = random_records(rng, count)
+            triggers = [float(rng.randrange(-10, 1010)) if rng.random() < 0.5 else rng.uniform(-10, 1010)
+                        for _ in range(trigger_count)]
+            expected = brute_force_cross_match(records, triggers, window)
+            for _ in self.backends():
+                self.assertEqual(gw_query.TimeIndex(records).cross_match(triggers, window), expected)
+
+    def test_no_triggers(self):
+        records = random_records(random.Random(3), 50)
+        for _ in self.backends():
+            self.assertEqual(gw_query.TimeIndex(records).cross_match([], 10.0), [])
+
+
+class CrossmatchArgumentsTest(unittest.TestCase):
+
+    def test_window_must_be_finite_and_not_negative(self):
+        for window in ('-1', 'nan', 'NaN', 'inf', '-inf', 'ten'):
+            with self.subTest(window=window), contextlib.redirect_stderr(io.StringIO()) as stderr:
+                with self.assertRaises(SystemExit) as exit:
+                    gw_query.crossmatch(['triggers.csv', '--window', window])
+                self.assertEqual(exit.exception.code, 2)
+                self.assertIn('--window', stderr.getvalue())
+        self.assertEqual(gw_query.coincidence_window('0'), 0.0)
+
+    def test_trigger_times_must_be_finite(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'triggers.csv'
+            for value in ('nan', 'inf', '', 'soon'):
+                path.write_text(f'id,gps_time\na,1e9\nb,{value}\n', encoding='utf-8')
+                with self.subTest(value=value), self.assertRaisesRegex(ValueError, ':3:'):
+                    gw_query.load_triggers(path)
+
+
+if __name__ == '__main__':
+    unittest.main()